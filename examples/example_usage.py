@@ -5,7 +5,7 @@ This script demonstrates basic operations
 
 from rag_pipeline import LocalRAGPipeline
 from pathlib import Path
-import json
+import orjson
 
 
 def example_1_basic_setup():
@@ -146,17 +146,17 @@ def example_4_batch_queries():
         "What are neural networks?",
     ]
     
-    results = []
-    for query in queries:
-        print(f"\n📝 Query: {query}")
-        result = rag.query(query, search_type="hybrid", top_k=2)
+    # One embedding pass and one index search for all queries
+    results = rag.query_batch(queries, search_type="hybrid", top_k=2)
+    for result in results:
+        print(f"\n📝 Query: {result['question']}")
         print(f"✅ Answer: {result['answer'][:150]}...")
-        results.append(result)
     
     # Save results
     output_file = "./batch_results.json"
-    with open(output_file, 'w') as f:
-        json.dump(results, f, indent=2)
+    Path(output_file).write_bytes(
+        orjson.dumps(results, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY)
+    )
     
     print(f"\n💾 Results saved to {output_file}")
 
@@ -176,12 +176,10 @@ def example_5_inspect_knowledge_graph():
     
     # Find most connected entities
     print("\n🔗 Most Connected Entities:")
-    degrees = dict(rag.knowledge_graph.degree())
-    top_entities = sorted(degrees.items(), key=lambda x: x[1], reverse=True)[:10]
-    
-    for entity, degree in top_entities:
+    # Degrees are cached as arrays when the graph is built or loaded
+    for entity, degree in rag.top_nodes(10, by="degree"):
         node_type = rag.knowledge_graph.nodes[entity].get('type', 'unknown')
-        print(f"  {entity} ({node_type}): {degree} connections")
+        print(f"  {entity} ({node_type}): {int(degree)} connections")
     
     # Show relationships
     print("\n🔀 Sample Relationships:")
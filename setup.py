@@ -51,6 +51,10 @@ setup(
         "gpu": [
             "faiss-gpu>=1.7.4",
         ],
+        "server": [
+            "fastapi>=0.100.0",
+            "uvicorn>=0.22.0",
+        ],
     },
     entry_points={
         "console_scripts": [
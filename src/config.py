@@ -8,6 +8,7 @@ LLM_MODEL = "microsoft/phi-2"          # Options: microsoft/phi-2, mistralai/Mis
 # Document Processing
 CHUNK_SIZE = 500          # Size of text chunks (characters)
 CHUNK_OVERLAP = 50        # Overlap between chunks (characters)
+SPLITTER = "recursive"    # "recursive" (characters) or "token" (tiktoken tokens)
 
 # Storage
 STORAGE_PATH = "./my_rag_storage"  # Where to save/load indices
@@ -26,7 +27,14 @@ GENERATION_TEMPERATURE = 0.7  # Creativity (0.0 = deterministic, 1.0 = creative)
 
 # Performance
 USE_GPU = True  # Use GPU if available
-BATCH_SIZE = 32  # Batch size for embedding generation
+BATCH_SIZE = None  # Embedding batch size (None = 128 on GPU, 32 on CPU)
+QUANTIZE_EMBEDDINGS = True  # Store embeddings as int8 (False = keep float32)
+CACHE_EMBEDDINGS = True  # Reuse embeddings of unchanged chunks across rebuilds
+ANSWER_CACHE_SIZE = 1024  # Answers cached for near-duplicate queries (0 = off)
+ANSWER_CACHE_THRESHOLD = 0.97  # Cosine similarity needed to reuse an answer
+
+# Document Loading
+LOAD_WORKERS = None  # Parallel file loaders (None = CPU count - 1, 1 = sequential)
 
 # Supported File Types
 SUPPORTED_EXTENSIONS = ['.txt', '.pdf', '.docx', '.md', '.csv']
@@ -35,8 +43,12 @@ SUPPORTED_EXTENSIONS = ['.txt', '.pdf', '.docx', '.md', '.csv']
 SEPARATORS = ["\n\n", "\n", ". ", " ", ""]  # Separator hierarchy
 
 # Advanced: Vector Index Configuration
-VECTOR_INDEX_TYPE = "FlatL2"  # FAISS index type
-# Options: FlatL2 (exact), IVFFlat (faster for large datasets)
+VECTOR_INDEX_TYPE = "auto"  # "flat", "hnsw", "ivfpq", or "auto" (by corpus size)
+HNSW_THRESHOLD = 10000  # Chunk count above which "auto" uses HNSW
+IVF_THRESHOLD = 50000  # Chunk count above which "auto" uses IVF-PQ
+IVF_NLIST = None  # Number of IVF clusters (None = sqrt of chunk count)
+IVF_NPROBE = 16  # Clusters searched per query (higher = better recall, slower)
+SEARCH_THREADS = None  # OpenMP threads for FAISS search (None = half the CPUs)
 
 # Advanced: Knowledge Graph Configuration
 ENTITY_MIN_LENGTH = 5  # Minimum length for entity extraction
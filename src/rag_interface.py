@@ -4,11 +4,75 @@ Provides a command-line interface to interact with your documents
 """
 
 import argparse
-from pathlib import Path
+import asyncio
 from rag_pipeline import LocalRAGPipeline
 import json
 
 
+class QueryBatcher:
+    """Coalesces concurrent queries into batched pipeline calls"""
+    
+    MAX_BATCH = 16
+    MAX_WAIT_MS = 50
+    
+    def __init__(self, rag: LocalRAGPipeline, search_type: str = "hybrid", top_k: int = 5):
+        self.rag = rag
+        self.search_type = search_type
+        self.top_k = top_k
+        self._queue = None
+        self._worker = None
+    
+    async def submit(self, question: str) -> dict:
+        """Queue a question and wait for its result"""
+        if self._worker is None:
+            # Created lazily so the queue binds to the running event loop
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.ensure_future(self._run())
+        
+        future = asyncio.get_event_loop().create_future()
+        await self._queue.put((question, future))
+        return await future
+    
+    async def _next_batch(self) -> list:
+        """Wait for one request, then collect more until the batch is full or the window closes"""
+        loop = asyncio.get_event_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.MAX_WAIT_MS / 1000
+        
+        while len(batch) < self.MAX_BATCH:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        
+        return batch
+    
+    async def _run(self):
+        """Worker loop: one query_batch call per collected batch"""
+        loop = asyncio.get_event_loop()
+        while True:
+            batch = await self._next_batch()
+            questions = [question for question, _ in batch]
+            
+            try:
+                # Runs off the event loop so new requests keep queueing
+                results = await loop.run_in_executor(
+                    None, self.rag.query_batch, questions, self.search_type, self.top_k
+                )
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+
 class RAGInterface:
     """Interactive interface for RAG pipeline"""
     
@@ -114,19 +178,23 @@ class RAGInterface:
                 
                 # Process query
                 print("\n🔍 Searching...")
-                result = self.rag.query(user_input, search_type=search_type, top_k=5)
+                retrieved_docs = self.rag.retrieve(user_input, search_type=search_type, top_k=5)
                 
                 print("\n" + "="*80)
                 print("🤖 Answer:")
                 print("="*80)
-                print(f"\n{result['answer']}\n")
+                print()
+                # Stream tokens as they are generated
+                for token in self.rag.generate_answer_stream(user_input, retrieved_docs):
+                    print(token, end="", flush=True)
+                print("\n")
                 
                 print("="*80)
                 print("📚 Sources:")
                 print("="*80)
-                for i, doc in enumerate(result['retrieved_documents'][:3], 1):
-                    print(f"\n{i}. {doc['metadata'].get('source', 'Unknown')}")
-                    print(f"   {doc['content'][:150]}...")
+                for i, doc in enumerate(retrieved_docs[:3], 1):
+                    print(f"\n{i}. {doc.metadata.get('source', 'Unknown')}")
+                    print(f"   {doc.content[:150]}...")
                 
             except KeyboardInterrupt:
                 print("\n\n👋 Goodbye!")
@@ -160,6 +228,25 @@ class RAGInterface:
             print(f"   Content: {doc['content'][:200]}...")
         
         return result
+    
+    def serve(self, host: str = "127.0.0.1", port: int = 8000, search_type: str = "hybrid"):
+        """Serve queries over HTTP, batching concurrent requests"""
+        try:
+            import uvicorn
+            from fastapi import Body, FastAPI
+        except ImportError:
+            print("❌ Error: --serve requires fastapi and uvicorn (pip install fastapi uvicorn)")
+            return
+        
+        batcher = QueryBatcher(self.rag, search_type=search_type, top_k=5)
+        app = FastAPI(title="Local RAG Pipeline")
+        
+        @app.post("/query")
+        async def query(question: str = Body(..., embed=True)):
+            return await batcher.submit(question)
+        
+        print(f"\n🌐 Serving on http://{host}:{port}/query")
+        uvicorn.run(app, host=host, port=port)
 
 
 def main():
@@ -206,6 +293,26 @@ def main():
         help='Search type (default: hybrid)'
     )
     
+    parser.add_argument(
+        '--serve',
+        action='store_true',
+        help='Serve queries over HTTP (requires fastapi and uvicorn)'
+    )
+    
+    parser.add_argument(
+        '--host',
+        type=str,
+        default='127.0.0.1',
+        help='Host to bind in serve mode (default: 127.0.0.1)'
+    )
+    
+    parser.add_argument(
+        '--port',
+        type=int,
+        default=8000,
+        help='Port to bind in serve mode (default: 8000)'
+    )
+    
     parser.add_argument(
         '--force-init',
         action='store_true',
@@ -217,7 +324,7 @@ def main():
     interface = RAGInterface(storage_path=args.storage)
     
     # Check if we need to initialize or load
-    storage_exists = Path(args.storage).exists() and (Path(args.storage) / "documents.pkl").exists()
+    storage_exists = LocalRAGPipeline.storage_exists(args.storage)
     
     if args.documents or args.force_init or not storage_exists:
         if not args.documents:
@@ -239,9 +346,11 @@ def main():
         if not success:
             return
     
-    # Run query or interactive mode
+    # Run query, server or interactive mode
     if args.query:
         interface.single_query(args.query, args.search_type)
+    elif args.serve:
+        interface.serve(args.host, args.port, args.search_type)
     else:
         interface.interactive_mode()
 
@@ -4,16 +4,45 @@ Combines semantic search with knowledge graph relationships for enhanced retriev
 """
 
 import os
+import copy
 import json
 import pickle
+import re
+import shutil
+import asyncio
+import functools
+import hashlib
+import sqlite3
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import ExitStack
 from pathlib import Path
-from typing import List, Dict, Any, Tuple, Optional
+from collections import OrderedDict, defaultdict
+from collections.abc import Sequence as SequenceABC
+from contextlib import contextmanager
+from threading import Thread
+from typing import (
+    List,
+    Dict,
+    Any,
+    Tuple,
+    Optional,
+    Iterable,
+    Iterator,
+    Sequence,
+    Set,
+    Union,
+)
 from dataclasses import dataclass
 import numpy as np
-from collections import defaultdict
+import orjson
 
 # Document processing
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+from langchain_text_splitters import (
+    RecursiveCharacterTextSplitter,
+    TextSplitter,
+    TokenTextSplitter,
+)
 from langchain_community.document_loaders import (
     TextLoader,
     PDFMinerLoader,
@@ -28,36 +57,609 @@ from sentence_transformers import SentenceTransformer
 # Vector store
 import faiss
 
+# SIMD similarity kernels (falls back to NumPy when unavailable)
+try:
+    import simsimd
+except ImportError:
+    simsimd = None
+
 # Graph database
 import networkx as nx
 
+# Compiled graph kernels
+try:
+    from .graph_kernels import score_nodes
+except ImportError:
+    from graph_kernels import score_nodes
+
 # LLM (local)
-from transformers import AutoTokenizer, AutoModelForCausalLM, pipeline
+from transformers import (
+    AutoTokenizer,
+    AutoModelForCausalLM,
+    StoppingCriteria,
+    StoppingCriteriaList,
+    TextIteratorStreamer,
+    pipeline,
+)
 import torch
 
 
+@contextmanager
+def _atomic_path(path: Path):
+    """
+    Yield a temporary path that replaces path once written
+
+    Files that may still be memory-mapped must never be truncated in place.
+    Replacing a mapped file fails on Windows, so callers skip files that
+    are mapped and unchanged (see _is_mapped_from).
+    """
+    tmp_path = path.with_name(path.name + ".tmp")
+    yield tmp_path
+    os.replace(tmp_path, path)
+
+
+def _is_mapped_from(data: Any, path: Path) -> bool:
+    """Check whether data is a read-only memory map of the file at path"""
+    if isinstance(data, DocumentStore):
+        source = (
+            data.storage_path / DocumentStore.BLOB_FILE if data.storage_path else None
+        )
+    elif isinstance(data, np.memmap) and data.filename is not None:
+        source = Path(data.filename)
+    else:
+        return False
+    return (
+        source is not None
+        and source.exists()
+        and path.exists()
+        and source.samefile(path)
+    )
+
+
+def _cosine_similarity(queries: np.ndarray, matrix: np.ndarray) -> np.ndarray:
+    """
+    Cosine similarity between every query row and every matrix row
+
+    Args:
+        queries: Array of shape (B, d)
+        matrix: Array of shape (N, d)
+
+    Returns:
+        Similarity array of shape (B, N)
+    """
+    if simsimd is not None:
+        distances = simsimd.cdist(queries, matrix, metric="cosine")
+        return 1.0 - np.asarray(distances, dtype=np.float32)
+
+    queries = queries.astype(np.float32, copy=False)
+    matrix = matrix.astype(np.float32, copy=False)
+    q_norms = np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+    m_norms = np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+    return (queries / q_norms) @ (matrix / m_norms).T
+
+
+def _quantize_int8(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Symmetric per-vector int8 quantization
+
+    Args:
+        vectors: Float array of shape (N, d)
+
+    Returns:
+        Tuple of (int8 array of shape (N, d), float32 scales of shape (N,))
+    """
+    scales = np.abs(vectors).max(axis=1) / 127.0
+    scales = np.maximum(scales, 1e-12).astype(np.float32, copy=False)
+    # Divide and round in one scratch buffer before the int8 cast
+    scaled = np.divide(vectors, scales[:, None], dtype=np.float32)
+    np.rint(scaled, out=scaled)
+    return scaled.astype(np.int8), scales
+
+
+class EmbeddingCache:
+    """
+    Persistent content-hash -> embedding cache backed by SQLite
+    """
+
+    def __init__(self, db_path: Path, model_name: str):
+        """
+        Open (or create) the cache database
+
+        Args:
+            db_path: Path to the SQLite database file
+            model_name: Embedding model the cached vectors belong to
+        """
+        self.db_path = Path(db_path)
+        self.model_name = model_name
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "model TEXT NOT NULL, key TEXT NOT NULL, vector BLOB NOT NULL, "
+            "PRIMARY KEY (model, key))"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def content_key(text: str) -> str:
+        """Hash text content into a cache key"""
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+    def get_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        """Return cached vectors for the given keys (missing keys are omitted)"""
+        found = {}
+        keys = list(keys)
+        for start in range(0, len(keys), 500):
+            batch = keys[start : start + 500]
+            placeholders = ",".join("?" * len(batch))
+            rows = self._conn.execute(
+                f"SELECT key, vector FROM embeddings "
+                f"WHERE model = ? AND key IN ({placeholders})",
+                [self.model_name, *batch],
+            )
+            for key, blob in rows:
+                found[key] = np.frombuffer(blob, dtype=np.float32)
+        return found
+
+    def put_many(self, items: Dict[str, np.ndarray]):
+        """Store vectors under their keys"""
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO embeddings (model, key, vector) VALUES (?, ?, ?)",
+            [
+                (self.model_name, key, np.asarray(vector, dtype=np.float32).tobytes())
+                for key, vector in items.items()
+            ],
+        )
+        self._conn.commit()
+
+
+class SemanticCache:
+    """
+    Query -> result cache matched by embedding similarity
+
+    Near-duplicate queries (cosine similarity above the threshold) reuse
+    the stored result. Least recently used entries are evicted first.
+    """
+
+    def __init__(self, dim: int, threshold: float = 0.97, max_entries: int = 1024):
+        """
+        Create an empty cache
+
+        Args:
+            dim: Embedding dimension
+            threshold: Minimum cosine similarity for a cache hit
+            max_entries: Maximum number of cached results
+        """
+        self.dim = dim
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[int, Tuple[np.ndarray, Any, Any]]" = OrderedDict()
+        self._next_id = 0
+        self._index = faiss.IndexIDMap2(faiss.IndexFlatIP(dim))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # FAISS indices are not picklable; rebuilt from the entries on load
+        state = self.__dict__.copy()
+        del state["_index"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]):
+        self.__dict__.update(state)
+        self._index = faiss.IndexIDMap2(faiss.IndexFlatIP(self.dim))
+        if self._entries:
+            self._index.add_with_ids(
+                np.stack([embedding for embedding, _, _ in self._entries.values()]),
+                np.fromiter(self._entries.keys(), dtype=np.int64),
+            )
+
+    def lookup(self, embedding: np.ndarray, key: Any) -> Optional[Any]:
+        """
+        Find a cached value for a similar query
+
+        Args:
+            embedding: Normalized query embedding of shape (1, d)
+            key: Extra key that must match exactly (e.g. search settings)
+
+        Returns:
+            Cached value, or None on a miss
+        """
+        if not self._entries:
+            return None
+
+        similarities, ids = self._index.search(embedding, min(8, len(self._entries)))
+        for similarity, entry_id in zip(similarities[0], ids[0]):
+            if entry_id < 0 or similarity < self.threshold:
+                break
+            _, entry_key, value = self._entries[entry_id]
+            if entry_key == key:
+                self._entries.move_to_end(entry_id)
+                return value
+        return None
+
+    def insert(self, embedding: np.ndarray, key: Any, value: Any):
+        """Cache a value under a normalized query embedding of shape (1, d)"""
+        if self.max_entries <= 0:
+            return
+
+        entry_id = self._next_id
+        self._next_id += 1
+        embedding = np.array(embedding, dtype=np.float32).reshape(1, -1)
+        self._index.add_with_ids(embedding, np.array([entry_id], dtype=np.int64))
+        self._entries[entry_id] = (embedding[0], key, value)
+
+        if len(self._entries) > self.max_entries:
+            oldest_id, _ = self._entries.popitem(last=False)
+            self._index.remove_ids(np.array([oldest_id], dtype=np.int64))
+
+    def clear(self):
+        """Drop all cached values"""
+        self._entries.clear()
+        self._index.reset()
+
+
+class StopOnStrings(StoppingCriteria):
+    """
+    Stop generating a sequence once it produces one of the stop strings
+
+    Only the last few generated tokens are decoded at each step, so the
+    check stays cheap for long answers.
+    """
+
+    WINDOW = 8
+
+    def __init__(self, tokenizer, stop_strings: List[str], prompt_length: int):
+        """
+        Args:
+            tokenizer: Tokenizer used to decode generated tokens
+            stop_strings: Strings that end an answer
+            prompt_length: Number of (padded) prompt tokens to skip
+        """
+        self.tokenizer = tokenizer
+        self.stop_strings = stop_strings
+        self.prompt_length = prompt_length
+
+    def __call__(
+        self, input_ids: torch.LongTensor, scores: torch.FloatTensor, **kwargs
+    ) -> torch.BoolTensor:
+        start = max(self.prompt_length, input_ids.shape[1] - self.WINDOW)
+        texts = self.tokenizer.batch_decode(
+            input_ids[:, start:], skip_special_tokens=True
+        )
+        if start == self.prompt_length:
+            # Leading whitespace before the answer is not a stop
+            texts = [text.lstrip() for text in texts]
+
+        return torch.tensor(
+            [any(stop in text for stop in self.stop_strings) for text in texts],
+            dtype=torch.bool,
+            device=input_ids.device,
+        )
+
+
+def _cut_at_stop_strings(
+    chunks: Iterable[str], stop_strings: List[str]
+) -> Iterator[str]:
+    """
+    Pass streamed text through until the first stop string
+
+    The streamer receives each token before the stopping criteria run, so
+    the stop string itself reaches the stream. Text that could still be the
+    start of a stop string is held back until it is known not to be one.
+
+    Args:
+        chunks: Streamed text chunks
+        stop_strings: Strings that end an answer
+
+    Yields:
+        Chunks of answer text, without leading whitespace or stop strings
+    """
+    buffer = ""
+    started = False
+    for chunk in chunks:
+        buffer += chunk
+        if not started:
+            # Leading whitespace before the answer is not a stop
+            buffer = buffer.lstrip()
+            started = bool(buffer)
+
+        stops = [buffer.find(stop) for stop in stop_strings if stop in buffer]
+        if stops:
+            if min(stops):
+                yield buffer[: min(stops)]
+            return
+
+        hold = max(
+            (
+                n
+                for stop in stop_strings
+                for n in range(1, len(stop))
+                if buffer.endswith(stop[:n])
+            ),
+            default=0,
+        )
+        if len(buffer) > hold:
+            yield buffer[: len(buffer) - hold]
+            buffer = buffer[len(buffer) - hold :]
+
+    if buffer:
+        yield buffer
+
+
 @dataclass
 class Document:
     """Document representation"""
 
     content: str
     metadata: Dict[str, Any]
-    embedding: Optional[np.ndarray] = None
     doc_id: str = ""
 
 
+class DocumentStore(SequenceABC):
+    """
+    Read-only document sequence backed by a memory-mapped text blob
+
+    Chunk text is stored as one UTF-8 blob plus an offsets array and is
+    decoded on access, so a loaded corpus does not keep every chunk as a
+    Python string. Ids and metadata are kept as JSON lines.
+    """
+
+    BLOB_FILE = "documents.bin"
+    OFFSETS_FILE = "documents_offsets.npy"
+    META_FILE = "documents_meta.jsonl"
+
+    def __init__(
+        self,
+        blob: np.ndarray,
+        offsets: np.ndarray,
+        doc_ids: List[str],
+        metadata: List[Dict[str, Any]],
+        storage_path: Optional[Path] = None,
+    ):
+        self._blob = blob
+        self._offsets = offsets
+        self._doc_ids = doc_ids
+        self._metadata = metadata
+        self.storage_path = storage_path  # Directory the files are mapped from
+
+    @classmethod
+    def write(cls, storage_path: Path, documents: Sequence[Document]):
+        """
+        Write documents as a text blob, offsets and metadata
+
+        Args:
+            storage_path: Directory to write to
+            documents: Documents to store
+        """
+        offsets = np.zeros(len(documents) + 1, dtype=np.int64)
+        with _atomic_path(storage_path / cls.BLOB_FILE) as tmp_path, open(
+            tmp_path, "wb"
+        ) as f:
+            for i, doc in enumerate(documents):
+                encoded = doc.content.encode("utf-8")
+                f.write(encoded)
+                offsets[i + 1] = offsets[i] + len(encoded)
+
+        with _atomic_path(storage_path / cls.OFFSETS_FILE) as tmp_path, open(
+            tmp_path, "wb"
+        ) as f:
+            np.save(f, offsets)
+
+        with _atomic_path(storage_path / cls.META_FILE) as tmp_path, open(
+            tmp_path, "wb"
+        ) as f:
+            for doc in documents:
+                f.write(orjson.dumps({"doc_id": doc.doc_id, "metadata": doc.metadata}))
+                f.write(b"\n")
+
+    @classmethod
+    def open(cls, storage_path: Path) -> "DocumentStore":
+        """
+        Open documents written by write()
+
+        Args:
+            storage_path: Directory to read from
+
+        Returns:
+            Document store over the memory-mapped blob
+        """
+        blob_path = storage_path / cls.BLOB_FILE
+        # np.memmap cannot map an empty file
+        blob = (
+            np.memmap(blob_path, dtype=np.uint8, mode="r")
+            if blob_path.stat().st_size > 0
+            else np.empty(0, dtype=np.uint8)
+        )
+        offsets = np.load(storage_path / cls.OFFSETS_FILE, mmap_mode="r")
+
+        doc_ids, metadata = [], []
+        with open(storage_path / cls.META_FILE, "rb") as f:
+            for line in f:
+                entry = orjson.loads(line)
+                doc_ids.append(entry["doc_id"])
+                metadata.append(entry["metadata"])
+        return cls(blob, offsets, doc_ids, metadata, storage_path)
+
+    @classmethod
+    def exists(cls, storage_path: Path) -> bool:
+        """Check whether a document store was written to storage_path"""
+        return (storage_path / cls.OFFSETS_FILE).exists()
+
+    @property
+    def doc_ids(self) -> List[str]:
+        """Document ids in storage order"""
+        return self._doc_ids
+
+    def __len__(self) -> int:
+        return len(self._doc_ids)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("document index out of range")
+
+        start, end = self._offsets[index], self._offsets[index + 1]
+        return Document(
+            content=self._blob[start:end].tobytes().decode("utf-8"),
+            metadata=self._metadata[index],
+            doc_id=self._doc_ids[index],
+        )
+
+
+# Capitalized words of 6+ letters are treated as entities
+_ENTITY_RE = re.compile(r"\b[A-Z][A-Za-z]{5,}\b")
+
+# File loaders by extension
+LOADERS = {
+    ".txt": TextLoader,
+    ".pdf": PDFMinerLoader,
+    ".docx": Docx2txtLoader,
+    ".md": UnstructuredMarkdownLoader,
+    ".csv": CSVLoader,
+}
+
+# Extensions whose parsers are CPU-heavy enough to warrant worker processes
+PROCESS_EXTENSIONS = {".pdf", ".docx"}
+
+# Spawned workers re-import the pipeline's dependencies, so only use them
+# when there are enough heavy files to amortize the startup cost
+MIN_PROCESS_FILES = 4
+
+
+@functools.lru_cache(maxsize=None)
+def _make_text_splitter(kind: str, chunk_size: int, chunk_overlap: int) -> TextSplitter:
+    """
+    Build one of the built-in text splitters
+
+    Cached so worker processes build each splitter once rather than per file.
+
+    Args:
+        kind: 'recursive' (sizes in characters) or 'token' (sizes in
+            tiktoken tokens)
+        chunk_size: Size of text chunks
+        chunk_overlap: Overlap between chunks
+
+    Returns:
+        Text splitter
+    """
+    if kind == "token":
+        # Rust-backed tokenizer instead of Python-level string scanning
+        return TokenTextSplitter.from_tiktoken_encoder(
+            chunk_size=chunk_size, chunk_overlap=chunk_overlap
+        )
+    return RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        separators=["\n\n", "\n", ". ", " ", ""],
+    )
+
+
+def _load_file_with_splitter(
+    file_path: Path, splitter_args: Tuple[str, int, int]
+) -> List[Document]:
+    """
+    Load and chunk a single file in a worker process
+
+    The splitter is rebuilt from its settings because built-in splitters
+    hold local closures (e.g. the tiktoken length function) that cannot be
+    pickled into the worker.
+
+    Args:
+        file_path: File to load
+        splitter_args: Arguments for _make_text_splitter
+
+    Returns:
+        List of document chunks (empty if unsupported or unreadable)
+    """
+    return _load_file(file_path, _make_text_splitter(*splitter_args))
+
+
+def _load_file(file_path: Path, text_splitter: TextSplitter) -> List[Document]:
+    """
+    Load and chunk a single file based on extension
+
+    Defined at module level so it can run in worker processes.
+
+    Args:
+        file_path: File to load
+        text_splitter: Splitter used to chunk the file content
+
+    Returns:
+        List of document chunks (empty if unsupported or unreadable)
+    """
+    extension = file_path.suffix.lower()
+
+    if extension not in LOADERS:
+        return []
+
+    try:
+        loader = LOADERS[extension](str(file_path))
+        raw_docs = loader.load()
+
+        # Split into chunks
+        chunks = []
+        for doc in raw_docs:
+            splits = text_splitter.split_text(doc.page_content)
+            for i, split in enumerate(splits):
+                chunks.append(
+                    Document(
+                        content=split,
+                        metadata={
+                            "source": str(file_path),
+                            "chunk_id": i,
+                            "total_chunks": len(splits),
+                        },
+                        doc_id=f"{file_path.stem}_{i}",
+                    )
+                )
+
+        return chunks
+    except Exception as e:
+        print(f"Error loading {file_path}: {e}")
+        return []
+
+
 class LocalRAGPipeline:
     """
     Local RAG pipeline combining vector search and graph-based retrieval
     """
 
+    # HNSW graph degree and search breadth
+    HNSW_M = 32
+    HNSW_EF_SEARCH = 64
+
+    # Generated text that ends an answer
+    STOP_STRINGS = ["\n\n", "\nQuestion:"]
+
     def __init__(
         self,
         embedding_model: str = "all-MiniLM-L6-v2",
         llm_model: str = "microsoft/phi-2",
         chunk_size: int = 500,
         chunk_overlap: int = 50,
+        splitter: Union[str, TextSplitter] = "recursive",
         storage_path: str = "./rag_storage",
+        quantize_embeddings: bool = True,
+        cache_embeddings: bool = True,
+        index_type: str = "auto",
+        hnsw_threshold: int = 10_000,
+        ivf_threshold: int = 50_000,
+        ivf_nlist: Optional[int] = None,
+        ivf_nprobe: int = 16,
+        use_gpu: bool = True,
+        use_gpu_index: Optional[bool] = None,
+        batch_size: Optional[int] = None,
+        n_workers: Optional[int] = None,
+        search_threads: Optional[int] = None,
+        answer_cache_size: int = 1024,
+        answer_cache_threshold: float = 0.97,
+        do_sample: bool = False,
+        compile_llm: bool = False,
     ):
         """
         Initialize the RAG pipeline
@@ -67,31 +669,119 @@ class LocalRAGPipeline:
             llm_model: HuggingFace model for generation
             chunk_size: Size of text chunks
             chunk_overlap: Overlap between chunks
+            splitter: 'recursive' (sizes in characters), 'token' (sizes in
+                tiktoken tokens; requires tiktoken), or a TextSplitter
             storage_path: Path to store indices and graphs
+            quantize_embeddings: Keep stored embeddings as int8 instead of float32
+            cache_embeddings: Reuse embeddings of previously seen chunks
+            index_type: FAISS index to build: 'flat', 'hnsw', 'ivfpq', or
+                'auto' to choose by corpus size
+            hnsw_threshold: Corpus size above which 'auto' builds an HNSW index
+            ivf_threshold: Corpus size above which 'auto' builds an IVF-PQ index
+            ivf_nlist: Number of IVF clusters (default: sqrt of corpus size)
+            ivf_nprobe: Number of IVF clusters visited per query
+            use_gpu: Run embedding and vector search on the GPU when available
+            use_gpu_index: Override use_gpu for the FAISS index only
+            batch_size: Batch size for embedding and answer generation
+                (default: 128 for embedding on GPU, 32 otherwise)
+            n_workers: Parallel workers for document loading (default: one
+                less than the CPU count; 1 loads files sequentially)
+            search_threads: OpenMP threads for FAISS search (default: half
+                the CPU count, leaving the rest to the models)
+            answer_cache_size: Number of answers cached for similar queries
+                (0 disables the cache)
+            answer_cache_threshold: Cosine similarity above which a cached
+                answer is reused
+            do_sample: Sample answers at temperature 0.7 instead of greedy
+                decoding
+            compile_llm: Compile the LLM forward pass with torch.compile
+                over a static KV cache (CUDA only)
         """
         print("Initializing RAG Pipeline...")
 
         self.storage_path = Path(storage_path)
         self.storage_path.mkdir(exist_ok=True)
-
-        # Initialize embedding model
+        self.quantize_embeddings = quantize_embeddings
+        if index_type not in ("auto", "flat", "hnsw", "ivfpq"):
+            raise ValueError(f"Unknown index type: {index_type}")
+        if not isinstance(splitter, TextSplitter) and splitter not in (
+            "recursive",
+            "token",
+        ):
+            raise ValueError(f"Unknown splitter: {splitter}")
+        self.index_type = index_type
+        self.hnsw_threshold = hnsw_threshold
+        self.ivf_threshold = ivf_threshold
+        self.ivf_nlist = ivf_nlist
+        self._nprobe = ivf_nprobe
+        self.use_gpu = use_gpu
+        self.use_gpu_index = use_gpu if use_gpu_index is None else use_gpu_index
+        self.n_workers = n_workers or max(1, (os.cpu_count() or 1) - 1)
+        faiss.omp_set_num_threads(search_threads or max(1, (os.cpu_count() or 1) // 2))
+
+        # Initialize embedding model (FP16 on GPU halves memory traffic)
         print(f"Loading embedding model: {embedding_model}")
-        self.embedding_model = SentenceTransformer(embedding_model)
+        device = "cuda" if use_gpu and torch.cuda.is_available() else "cpu"
+        self.embedding_model = SentenceTransformer(embedding_model, device=device)
+        if device == "cuda":
+            self.embedding_model.half()
+        # GPU encoders stay underutilized at small batches
+        self.batch_size = batch_size or (128 if device == "cuda" else 32)
+        self.generation_batch_size = batch_size or 32
         self.embedding_dim = self.embedding_model.get_sentence_embedding_dimension()
+        self.embedding_cache = (
+            EmbeddingCache(self.storage_path / "emb_cache.db", embedding_model)
+            if cache_embeddings
+            else None
+        )
+
+        # Cache recent query embeddings
+        self._encode_query = functools.lru_cache(maxsize=1024)(self._embed_query)
 
-        # Initialize text splitter
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=chunk_size,
-            chunk_overlap=chunk_overlap,
-            separators=["\n\n", "\n", ". ", " ", ""],
+        # Cache hybrid search results of repeated queries (cleared whenever
+        # the index or graph changes)
+        self._hybrid_cache = functools.lru_cache(maxsize=256)(self._hybrid_search)
+
+        # Cache answers of near-duplicate queries
+        self.answer_cache = (
+            SemanticCache(
+                self.embedding_dim,
+                threshold=answer_cache_threshold,
+                max_entries=answer_cache_size,
+            )
+            if answer_cache_size > 0
+            else None
         )
 
+        # Initialize text splitter (runs inside the loader workers)
+        if isinstance(splitter, TextSplitter):
+            self.text_splitter = splitter
+            self._splitter_args = None
+        else:
+            self._splitter_args = (splitter, chunk_size, chunk_overlap)
+            self.text_splitter = _make_text_splitter(*self._splitter_args)
+
         # Initialize vector store (FAISS)
         self.vector_index = None
-        self.documents: List[Document] = []
+        self._gpu_resources = None
+        self._cpu_index = None  # CPU original while vector_index is on the GPU
+        self._index_file: Optional[Path] = None  # File the index is mapped from
+        self.documents: Sequence[Document] = []
+        self._doc_index: Dict[str, int] = {}
+        self.embeddings: Optional[np.ndarray] = None  # Contiguous (N, d) matrix
+        self.embedding_scales: Optional[np.ndarray] = None  # Set when int8
 
         # Initialize knowledge graph
         self.knowledge_graph = nx.DiGraph()
+        self._node_ids: List[str] = []
+        self._node_index: Dict[str, int] = {}
+        self._doc_nodes: Optional[np.ndarray] = None  # Node ids of documents
+        self._entity_nodes: Set[str] = set()
+        self._graph_indptr: Optional[np.ndarray] = None
+        self._graph_indices: Optional[np.ndarray] = None
+        self._graph_weights: Optional[np.ndarray] = None
+        self._node_degree: Optional[np.ndarray] = None
+        self._pagerank: Optional[np.ndarray] = None
 
         # Initialize LLM
         print(f"Loading LLM: {llm_model}")
@@ -105,16 +795,34 @@ class LocalRAGPipeline:
             trust_remote_code=True,
         )
 
+        # A static KV cache keeps decode-step shapes fixed, so the forward
+        # pass compiles once per cache size instead of once per token. CUDA
+        # graphs are left out: their state is thread-local, and streaming and
+        # aquery run generation on worker threads.
+        if compile_llm and torch.cuda.is_available() and hasattr(torch, "compile"):
+            self.llm.generation_config.cache_implementation = "static"
+            self.llm.forward = torch.compile(
+                self.llm.forward, mode="max-autotune-no-cudagraphs"
+            )
+        self.do_sample = do_sample
+
         # Set padding token if not set
         if self.tokenizer.pad_token is None:
             self.tokenizer.pad_token = self.tokenizer.eos_token
 
+        # Decoder-only models need left padding for batched generation
+        self.tokenizer.padding_side = "left"
+
         print("RAG Pipeline initialized successfully!")
 
     def load_documents(self, document_path: str) -> List[Document]:
         """
         Load documents from a directory or file
 
+        Files in a directory are parsed in parallel: PDF and DOCX files in
+        worker processes, plain-text formats in threads. Chunks are returned
+        in sorted file order regardless of completion order.
+
         Args:
             document_path: Path to documents
 
@@ -125,88 +833,272 @@ class LocalRAGPipeline:
         documents = []
 
         if path.is_file():
-            docs = self._load_single_file(path)
-            documents.extend(docs)
+            documents = self._load_single_file(path)
         elif path.is_dir():
-            for file_path in path.rglob("*"):
-                if file_path.is_file():
-                    try:
-                        docs = self._load_single_file(file_path)
-                        documents.extend(docs)
-                    except Exception as e:
-                        print(f"Error loading {file_path}: {e}")
+            file_paths = sorted(
+                p
+                for p in path.rglob("*")
+                if p.is_file() and p.suffix.lower() in LOADERS
+            )
+            for docs in self._load_files(file_paths):
+                documents.extend(docs)
 
         print(f"Loaded {len(documents)} document chunks")
         return documents
 
-    def _load_single_file(self, file_path: Path) -> List[Document]:
-        """Load a single file based on extension"""
-        extension = file_path.suffix.lower()
-
-        loaders = {
-            ".txt": TextLoader,
-            ".pdf": PDFMinerLoader,
-            ".docx": Docx2txtLoader,
-            ".md": UnstructuredMarkdownLoader,
-            ".csv": CSVLoader,
-        }
+    def _load_files(self, file_paths: List[Path]) -> List[List[Document]]:
+        """Load files concurrently, returning chunks in input order"""
+        n_workers = self.n_workers
+        if n_workers == 1:
+            return [self._load_single_file(file_path) for file_path in file_paths]
 
-        if extension not in loaders:
-            return []
-
-        try:
-            loader = loaders[extension](str(file_path))
-            raw_docs = loader.load()
-
-            # Split into chunks
-            chunks = []
-            for doc in raw_docs:
-                splits = self.text_splitter.split_text(doc.page_content)
-                for i, split in enumerate(splits):
-                    chunks.append(
-                        Document(
-                            content=split,
-                            metadata={
-                                "source": str(file_path),
-                                "chunk_id": i,
-                                "total_chunks": len(splits),
-                            },
-                            doc_id=f"{file_path.stem}_{i}",
-                        )
+        n_process_files = sum(
+            p.suffix.lower() in PROCESS_EXTENSIONS for p in file_paths
+        )
+        if n_process_files < MIN_PROCESS_FILES:
+            n_process_files = 0
+
+        # Worker processes need a picklable splitter: built-in splitters are
+        # rebuilt from their settings, custom ones are sent as-is if possible
+        if self._splitter_args is not None:
+            process_load, process_splitter = (
+                _load_file_with_splitter,
+                self._splitter_args,
+            )
+        else:
+            process_load, process_splitter = _load_file, self.text_splitter
+            if n_process_files:
+                try:
+                    pickle.dumps(self.text_splitter)
+                except Exception:
+                    n_process_files = 0
+
+        with ExitStack() as stack:
+            thread_pool = stack.enter_context(ThreadPoolExecutor(max_workers=n_workers))
+            process_pool = (
+                stack.enter_context(
+                    # Spawn rather than fork: the parent already runs
+                    # torch/OpenMP/Numba threads that do not survive fork
+                    ProcessPoolExecutor(
+                        max_workers=min(n_workers, n_process_files),
+                        mp_context=multiprocessing.get_context("spawn"),
                     )
+                )
+                if n_process_files
+                else None
+            )
 
-            return chunks
-        except Exception as e:
-            print(f"Error loading {file_path}: {e}")
-            return []
+            futures = [
+                (
+                    process_pool.submit(process_load, file_path, process_splitter)
+                    if process_pool and file_path.suffix.lower() in PROCESS_EXTENSIONS
+                    else thread_pool.submit(_load_file, file_path, self.text_splitter)
+                )
+                for file_path in file_paths
+            ]
 
-    def build_vector_index(self, documents: List[Document]):
+            results = []
+            for file_path, future in zip(file_paths, futures):
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    print(f"Error loading {file_path}: {e}")
+                    results.append([])
+
+        return results
+
+    def _load_single_file(self, file_path: Path) -> List[Document]:
+        """Load a single file based on extension"""
+        return _load_file(file_path, self.text_splitter)
+
+    def build_vector_index(
+        self, documents: List[Document], batch_size: Optional[int] = None
+    ):
         """
         Build FAISS vector index from documents
 
         Args:
             documents: List of documents to index
+            batch_size: Embedding batch size (default: the pipeline's)
         """
         print("Building vector index...")
 
         self.documents = documents
+        self._doc_index = {doc.doc_id: i for i, doc in enumerate(documents)}
+        self._clear_result_caches()
 
         # Generate embeddings
         texts = [doc.content for doc in documents]
-        embeddings = self.embedding_model.encode(
-            texts, show_progress_bar=True, batch_size=32
-        )
+        embeddings = self._embed_texts(texts, batch_size)
+
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        faiss.normalize_L2(embeddings)  # Also covers vectors cached unnormalized
 
-        # Store embeddings in documents
-        for doc, emb in zip(documents, embeddings):
-            doc.embedding = emb
+        # Keep one contiguous matrix for SIMD re-scoring
+        self._set_embeddings(embeddings)
 
         # Create FAISS index
-        self.vector_index = faiss.IndexFlatL2(self.embedding_dim)
-        self.vector_index.add(embeddings.astype("float32"))
+        self.vector_index = self._to_gpu(self._create_index(embeddings))
+        self._index_file = None
 
         print(f"Vector index built with {len(documents)} documents")
 
+    def _create_index(self, embeddings: np.ndarray) -> faiss.Index:
+        """
+        Create and fill a FAISS index sized for the corpus
+
+        Embeddings are unit length, so every index uses inner product and
+        its scores are cosine similarities. Small corpora get a flat index of
+        8-bit scalar-quantized codes, medium ones an HNSW graph, and large
+        ones IVF-PQ, which only scans a few clusters of compressed vectors
+        per query.
+
+        Args:
+            embeddings: Float32 array of shape (N, d)
+
+        Returns:
+            Populated FAISS index
+        """
+        n_vectors = len(embeddings)
+        index_type = self.index_type
+        if index_type == "auto":
+            if n_vectors > self.ivf_threshold:
+                index_type = "ivfpq"
+            elif n_vectors > self.hnsw_threshold:
+                index_type = "hnsw"
+            else:
+                index_type = "flat"
+
+        if index_type == "flat":
+            index = faiss.IndexScalarQuantizer(
+                self.embedding_dim,
+                faiss.ScalarQuantizer.QT_8bit,
+                faiss.METRIC_INNER_PRODUCT,
+            )
+        elif index_type == "hnsw":
+            print(f"Building HNSW index (M={self.HNSW_M})...")
+            index = faiss.IndexHNSWFlat(
+                self.embedding_dim, self.HNSW_M, faiss.METRIC_INNER_PRODUCT
+            )
+            index.hnsw.efSearch = self.HNSW_EF_SEARCH
+        else:
+            # Cannot have more clusters than training points
+            nlist = min(self.ivf_nlist or int(np.sqrt(n_vectors)), n_vectors)
+            # PQ needs a sub-quantizer count that divides the dimension
+            n_subquantizers = max(
+                m
+                for m in range(1, self.embedding_dim // 4 + 1)
+                if self.embedding_dim % m == 0
+            )
+            print(f"Training IVF-PQ index (nlist={nlist}, M={n_subquantizers})...")
+            index = faiss.index_factory(
+                self.embedding_dim,
+                f"IVF{nlist},PQ{n_subquantizers}x8",
+                faiss.METRIC_INNER_PRODUCT,
+            )
+
+        index.train(embeddings)
+        index.add(embeddings)
+        return index
+
+    def _to_gpu(self, index: faiss.Index) -> faiss.Index:
+        """
+        Move a CPU index to the first GPU when one is available
+
+        The CPU index is kept for saving, so the on-disk format does not
+        depend on where the index was searched.
+        """
+        self._cpu_index = None
+        # HNSW has no GPU implementation
+        if isinstance(index, faiss.IndexHNSW) or not (
+            self.use_gpu_index
+            and hasattr(faiss, "StandardGpuResources")
+            and faiss.get_num_gpus() > 0
+        ):
+            return index
+
+        gpu_source = index
+        if isinstance(index, faiss.IndexScalarQuantizer):
+            # There is no GPU flat SQ index; search the decoded vectors as an
+            # FP16 GEMM instead
+            gpu_source = faiss.IndexFlat(index.d, index.metric_type)
+            gpu_source.add(index.reconstruct_n(0, index.ntotal))
+
+        options = faiss.GpuClonerOptions()
+        options.useFloat16 = True
+        try:
+            if self._gpu_resources is None:
+                self._gpu_resources = faiss.StandardGpuResources()
+            gpu_index = faiss.index_cpu_to_gpu(
+                self._gpu_resources, 0, gpu_source, options
+            )
+        except RuntimeError as e:
+            print(f"Keeping vector index on CPU: {e}")
+            return index
+
+        self._cpu_index = index
+        return gpu_index
+
+    def _embed_texts(
+        self, texts: List[str], batch_size: Optional[int] = None
+    ) -> np.ndarray:
+        """Embed texts, reusing cached vectors for previously seen content"""
+        if self.embedding_cache is None:
+            return self._encode(texts, show_progress_bar=True, batch_size=batch_size)
+
+        if not texts:
+            return np.empty((0, self.embedding_dim), dtype=np.float32)
+
+        keys = [EmbeddingCache.content_key(text) for text in texts]
+        vectors = self.embedding_cache.get_many(set(keys))
+
+        # Only encode content that is not cached yet
+        missing = {key: text for key, text in zip(keys, texts) if key not in vectors}
+        if missing:
+            new_vectors = self._encode(
+                list(missing.values()), show_progress_bar=True, batch_size=batch_size
+            )
+            new_items = dict(zip(missing.keys(), new_vectors))
+            self.embedding_cache.put_many(new_items)
+            vectors.update(new_items)
+
+        print(f"Reused {len(texts) - len(missing)} cached embeddings")
+        return np.stack([vectors[key] for key in keys])
+
+    def _encode(
+        self,
+        texts: List[str],
+        show_progress_bar: bool = False,
+        batch_size: Optional[int] = None,
+    ) -> np.ndarray:
+        """
+        Encode texts into L2-normalized float32 embeddings
+
+        SentenceTransformer.encode already sorts texts by length before
+        batching and restores the input order, so padding stays minimal.
+        """
+        return self.embedding_model.encode(
+            texts,
+            batch_size=batch_size or self.batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=show_progress_bar,
+        ).astype(np.float32, copy=False)
+
+    def _embed_query(self, query: str) -> np.ndarray:
+        """Embed a single query as a read-only (1, d) float32 array"""
+        embedding = self._encode([query])
+        embedding.setflags(write=False)
+        return embedding
+
+    def _set_embeddings(self, embeddings: np.ndarray):
+        """Store the embedding matrix, int8-quantized if enabled"""
+        if self.quantize_embeddings:
+            self.embeddings, self.embedding_scales = _quantize_int8(embeddings)
+        else:
+            self.embeddings = embeddings
+            self.embedding_scales = None
+
     def build_knowledge_graph(self, documents: List[Document]):
         """
         Build knowledge graph from documents
@@ -217,70 +1109,229 @@ class LocalRAGPipeline:
         """
         print("Building knowledge graph...")
 
+        self._clear_result_caches()
+
+        # Collect nodes and edges for all documents first, then insert
+        # them in one bulk call each instead of mutating the graph per doc
+        node_batch: List[Tuple[str, Dict[str, Any]]] = []
+        edge_batch: List[Tuple[str, str, Dict[str, Any]]] = []
+        entity_nodes: Dict[str, None] = {}
+        by_source = defaultdict(list)
+
         # Simple entity extraction (can be enhanced with NER)
         for doc in documents:
             # Add document as a node
-            self.knowledge_graph.add_node(
-                doc.doc_id,
-                content=doc.content[:200],  # Store preview
-                type="document",
-                metadata=doc.metadata,
+            node_batch.append(
+                (
+                    doc.doc_id,
+                    {
+                        "content": doc.content[:200],  # Store preview
+                        "type": "document",
+                        "metadata": doc.metadata,
+                    },
+                )
             )
 
             # Extract simple co-occurrence relationships
             # In production, use NER and relation extraction
-            words = doc.content.split()
-            entities = [w for w in words if len(w) > 5 and w[0].isupper()]
-
-            # Add entities and relationships
-            for entity in set(entities):
-                if not self.knowledge_graph.has_node(entity):
-                    self.knowledge_graph.add_node(entity, type="entity")
-
-                self.knowledge_graph.add_edge(doc.doc_id, entity, relation="contains")
-
-            # Link documents with same source
-            for other_doc in documents:
-                if doc.doc_id != other_doc.doc_id and doc.metadata.get(
-                    "source"
-                ) == other_doc.metadata.get("source"):
-                    self.knowledge_graph.add_edge(
-                        doc.doc_id, other_doc.doc_id, relation="same_source"
-                    )
+            entities = set(_ENTITY_RE.findall(doc.content))
+            entity_nodes.update(dict.fromkeys(entities))
+            edge_batch.extend(
+                (doc.doc_id, entity, {"relation": "contains"}) for entity in entities
+            )
+
+            # Group chunks by source file once instead of comparing all pairs
+            source = doc.metadata.get("source")
+            if source is not None:
+                by_source[source].append(doc.doc_id)
+
+        node_batch.extend((entity, {"type": "entity"}) for entity in entity_nodes)
+
+        # Link documents with same source through one hub node per source
+        # (N edges instead of N^2)
+        for source, doc_ids in by_source.items():
+            source_node = f"source:{source}"
+            node_batch.append((source_node, {"type": "source"}))
+            edge_batch.extend(
+                (doc_id, source_node, {"relation": "same_source"}) for doc_id in doc_ids
+            )
+
+        self.knowledge_graph.add_nodes_from(node_batch)
+        self.knowledge_graph.add_edges_from(edge_batch)
+
+        self._build_graph_arrays()
 
         print(
             f"Knowledge graph built with {self.knowledge_graph.number_of_nodes()} nodes "
             f"and {self.knowledge_graph.number_of_edges()} edges"
         )
 
-    def vector_search(self, query: str, top_k: int = 5) -> List[Tuple[Document, float]]:
+    def _build_graph_arrays(self, saved: Optional[Dict[str, np.ndarray]] = None):
+        """
+        Export the knowledge graph as CSR arrays for the scoring kernel
+
+        Args:
+            saved: Arrays previously written by save(); reused instead of
+                re-exporting the graph when they match its node count
+        """
+        self._node_ids = list(self.knowledge_graph.nodes())
+        self._node_index = {node: i for i, node in enumerate(self._node_ids)}
+        self._entity_nodes = {
+            node
+            for node, data in self.knowledge_graph.nodes(data=True)
+            if data.get("type") == "entity"
+        }
+        self._doc_nodes = np.array(
+            [
+                i
+                for i, (_, data) in enumerate(self.knowledge_graph.nodes(data=True))
+                if data.get("type") == "document"
+            ],
+            dtype=np.int64,
+        )
+
+        if not self._node_ids:
+            self._graph_indptr = self._graph_indices = self._graph_weights = None
+            self._node_degree = self._pagerank = None
+            return
+
+        if saved is not None and len(saved["indptr"]) == len(self._node_ids) + 1:
+            self._graph_indptr = saved["indptr"]
+            self._graph_indices = saved["indices"]
+            self._graph_weights = saved["weights"]
+            self._node_degree = saved["degree"]
+            self._pagerank = None
+            return
+
+        # Walk relations in both directions (document <-> entity)
+        adjacency = nx.to_scipy_sparse_array(
+            self.knowledge_graph,
+            nodelist=self._node_ids,
+            weight=None,
+            dtype=np.float32,
+            format="csr",
+        )
+        adjacency = ((adjacency + adjacency.T) > 0).astype(np.float32).tocsr()
+
+        # Symmetric adjacency: row v holds the neighbours u of v, so the
+        # transition probability u -> v is 1 / degree(u)
+        degree = np.asarray(adjacency.sum(axis=1)).ravel()
+        inv_degree = np.divide(1.0, degree, out=np.zeros_like(degree), where=degree > 0)
+
+        self._graph_indptr = adjacency.indptr.astype(np.int32, copy=False)
+        self._graph_indices = adjacency.indices.astype(np.int32, copy=False)
+        self._graph_weights = inv_degree[adjacency.indices].astype(
+            np.float32, copy=False
+        )
+
+        self._node_degree = degree
+        self._pagerank = None  # Computed on first use by top_nodes
+
+    def top_nodes(self, k: int = 10, by: str = "degree") -> List[Tuple[str, float]]:
+        """
+        Most central knowledge graph nodes
+
+        Args:
+            k: Number of nodes to return
+            by: Centrality measure, 'degree' or 'pagerank'
+
+        Returns:
+            List of (node, score) tuples, highest score first
+        """
+        if by not in ("degree", "pagerank"):
+            raise ValueError(f"Unknown centrality measure: {by}")
+        if self._node_degree is None:
+            return []
+
+        if by == "pagerank" and self._pagerank is None:
+            # Global PageRank is the same power iteration with a uniform restart
+            pagerank = np.zeros(len(self._node_ids), dtype=np.float32)
+            score_nodes(
+                np.arange(len(self._node_ids), dtype=np.int32),
+                self._graph_indptr,
+                self._graph_indices,
+                self._graph_weights,
+                pagerank,
+                n_iter=30,
+            )
+            self._pagerank = pagerank
+
+        scores = self._node_degree if by == "degree" else self._pagerank
+        k = min(k, len(scores))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(self._node_ids[i], float(scores[i])) for i in top]
+
+    def vector_search(
+        self, query: Union[str, np.ndarray], top_k: int = 5
+    ) -> Union[List[Tuple[Document, float]], List[List[Tuple[Document, float]]]]:
         """
         Perform vector similarity search
 
         Args:
-            query: Query string
-            top_k: Number of results to return
+            query: Query string, or pre-encoded query embeddings of shape
+                (B, d) to search as one batch
+            top_k: Number of results to return per query
 
         Returns:
-            List of (document, score) tuples
+            List of (document, cosine similarity) tuples, most similar first
+            (one such list per row when query is an embedding array)
         """
         if self.vector_index is None:
             raise ValueError("Vector index not built. Call build_vector_index first.")
 
+        if isinstance(query, np.ndarray):
+            # Several queries per call let FAISS parallelize across them
+            query_embeddings = np.ascontiguousarray(query, dtype=np.float32)
+            scores, indices = self._search_index(query_embeddings, top_k)
+            return [
+                self._vector_results(row_scores, row_indices)
+                for row_scores, row_indices in zip(scores, indices)
+            ]
+
         # Encode query
-        query_embedding = self.embedding_model.encode([query])[0]
+        query_embedding = self._encode_query(query)
 
         # Search
-        distances, indices = self.vector_index.search(
-            query_embedding.reshape(1, -1).astype("float32"), top_k
-        )
-
-        results = []
-        for dist, idx in zip(distances[0], indices[0]):
-            if idx < len(self.documents):
-                results.append((self.documents[idx], float(dist)))
-
-        return results
+        scores, indices = self._search_index(query_embedding, top_k)
+        return self._vector_results(scores[0], indices[0])
+
+    def _vector_results(
+        self, scores: np.ndarray, indices: np.ndarray
+    ) -> List[Tuple[Document, float]]:
+        """Pair one row of FAISS results with their documents"""
+        # FAISS pads missing results with -1
+        return [
+            (self.documents[idx], float(score))
+            for score, idx in zip(scores, indices)
+            if idx >= 0
+        ]
+
+    @property
+    def nprobe(self) -> int:
+        """Number of IVF clusters visited per query"""
+        return self._nprobe
+
+    @nprobe.setter
+    def nprobe(self, value: int):
+        # Cached results were retrieved with the previous setting
+        self._nprobe = value
+        self._clear_result_caches()
+
+    def _search_index(
+        self, query_embeddings: np.ndarray, k: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Search the vector index with the current nprobe setting"""
+        if hasattr(self.vector_index, "nprobe"):
+            self.vector_index.nprobe = self.nprobe
+        scores, indices = self.vector_index.search(query_embeddings, k)
+        if self.vector_index.metric_type == faiss.METRIC_L2:
+            # Stores saved before the inner-product indexes hold squared L2
+            # distances between unit vectors: |a - b|^2 = 2 - 2 cos(a, b)
+            scores = 1.0 - scores / 2.0
+        return scores, indices
 
     def graph_search(self, query: str, top_k: int = 5) -> List[Document]:
         """
@@ -294,37 +1345,45 @@ class LocalRAGPipeline:
         Returns:
             List of relevant documents
         """
-        # First, find relevant entities in query
-        query_words = query.split()
-        query_entities = [w for w in query_words if len(w) > 3]
-
-        # Find nodes related to query entities
-        relevant_nodes = set()
-        for entity in query_entities:
-            if self.knowledge_graph.has_node(entity):
-                # Add the entity itself
-                relevant_nodes.add(entity)
-                # Add neighbors
-                relevant_nodes.update(self.knowledge_graph.neighbors(entity))
-
-        # Score documents by graph connectivity
-        doc_scores = defaultdict(float)
-        for node in relevant_nodes:
-            if self.knowledge_graph.nodes[node].get("type") == "document":
-                # Score based on centrality and connections
-                doc_scores[node] = (
-                    self.knowledge_graph.degree(node) * 0.5
-                    + nx.pagerank(self.knowledge_graph).get(node, 0) * 0.5
-                )
+        if self._graph_indptr is None:
+            return []
 
-        # Get top documents
-        top_doc_ids = sorted(
-            doc_scores.keys(), key=lambda x: doc_scores[x], reverse=True
-        )[:top_k]
+        # First, find relevant entities in query (one set intersection,
+        # tokenized like the documents so punctuation does not block matches)
+        query_entities = self._entity_nodes.intersection(_ENTITY_RE.findall(query))
+        seed_ids = np.array(
+            [self._node_index[e] for e in query_entities], dtype=np.int32
+        )
+        if len(seed_ids) == 0:
+            return []
+
+        # Score every node by personalized PageRank from the query entities
+        scores = np.zeros(len(self._node_ids), dtype=np.float32)
+        score_nodes(
+            seed_ids,
+            self._graph_indptr,
+            self._graph_indices,
+            self._graph_weights,
+            scores,
+        )
+
+        # Get top documents (partial selection, then sort only the top_k)
+        doc_scores = scores[self._doc_nodes]
+        if top_k < len(doc_scores):
+            top = np.argpartition(-doc_scores, top_k)[:top_k]
+        else:
+            top = np.arange(len(doc_scores))
+        top = top[np.argsort(-doc_scores[top], kind="stable")]
+        top_doc_ids = [
+            self._node_ids[self._doc_nodes[i]] for i in top if doc_scores[i] > 0
+        ]
 
         # Return document objects
-        doc_map = {doc.doc_id: doc for doc in self.documents}
-        return [doc_map[doc_id] for doc_id in top_doc_ids if doc_id in doc_map]
+        return [
+            self.documents[self._doc_index[doc_id]]
+            for doc_id in top_doc_ids
+            if doc_id in self._doc_index
+        ]
 
     def hybrid_search(
         self,
@@ -336,6 +1395,8 @@ class LocalRAGPipeline:
         """
         Combine vector and graph search with weighted scoring
 
+        Results of repeated calls with the same arguments are cached.
+
         Args:
             query: Query string
             top_k: Number of results to return
@@ -345,47 +1406,146 @@ class LocalRAGPipeline:
         Returns:
             List of top documents
         """
-        # Vector search results
-        vector_results = self.vector_search(query, top_k * 2)
-        vector_scores = {doc.doc_id: (1 / (1 + score)) for doc, score in vector_results}
+        return list(self._hybrid_cache(query, top_k, vector_weight, graph_weight))
+
+    def _hybrid_search(
+        self, query: str, top_k: int, vector_weight: float, graph_weight: float
+    ) -> Tuple[Document, ...]:
+        """Uncached hybrid search behind hybrid_search"""
+        if self.vector_index is None:
+            raise ValueError("Vector index not built. Call build_vector_index first.")
 
-        # Graph search results
-        graph_results = self.graph_search(query, top_k * 2)
+        # Vector search candidates from FAISS
+        query_embedding = self._encode_query(query)
+        _, indices = self._search_index(query_embedding, top_k * 2)
+
+        return tuple(
+            self._fuse_results(
+                query_embedding,
+                indices[0],
+                self.graph_search(query, top_k * 2),
+                top_k,
+                vector_weight,
+                graph_weight,
+            )
+        )
+
+    def hybrid_search_batch(
+        self,
+        queries: List[str],
+        top_k: int = 5,
+        vector_weight: float = 0.7,
+        graph_weight: float = 0.3,
+    ) -> List[List[Document]]:
+        """
+        Hybrid search for several queries at once
+
+        Queries are encoded in one batch and searched with one FAISS call,
+        while graph search runs on a worker thread.
+
+        Args:
+            queries: Query strings
+            top_k: Number of results to return per query
+            vector_weight: Weight for vector search
+            graph_weight: Weight for graph search
+
+        Returns:
+            List of top documents for each query, in query order
+        """
+        if self.vector_index is None:
+            raise ValueError("Vector index not built. Call build_vector_index first.")
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            graph_future = executor.submit(
+                lambda: [self.graph_search(query, top_k * 2) for query in queries]
+            )
+            query_embeddings = self._encode(queries)
+            return self._hybrid_batch(
+                query_embeddings,
+                graph_future,
+                top_k,
+                vector_weight,
+                graph_weight,
+            )
+
+    def _hybrid_batch(
+        self,
+        query_embeddings: np.ndarray,
+        graph_future: Future,
+        top_k: int,
+        vector_weight: float,
+        graph_weight: float,
+    ) -> List[List[Document]]:
+        """Fuse one batched FAISS search with pending graph search results"""
+        _, indices = self._search_index(query_embeddings, top_k * 2)
+        graph_results = graph_future.result()
+
+        return [
+            self._fuse_results(
+                query_embeddings[i : i + 1],
+                indices[i],
+                graph_results[i],
+                top_k,
+                vector_weight,
+                graph_weight,
+            )
+            for i in range(len(graph_results))
+        ]
+
+    def _fuse_results(
+        self,
+        query_embedding: np.ndarray,
+        candidate_indices: np.ndarray,
+        graph_results: List[Document],
+        top_k: int,
+        vector_weight: float,
+        graph_weight: float,
+    ) -> List[Document]:
+        """Blend re-scored vector candidates with graph search results"""
+        candidates = [int(idx) for idx in candidate_indices if idx >= 0]
+
+        # Score all candidates against the query in a single SIMD sweep
+        vector_scores = {}
+        if candidates:
+            if self.embeddings.dtype == np.int8:
+                query_embedding, _ = _quantize_int8(query_embedding)
+            similarities = _cosine_similarity(
+                query_embedding, self.embeddings[candidates]
+            )[0]
+            vector_scores = dict(zip(candidates, similarities.tolist()))
+
+        # Graph search results (keyed by position, like the vector scores,
+        # so candidates never need to be materialized)
         graph_scores = {
-            doc.doc_id: 1.0 / (i + 1) for i, doc in enumerate(graph_results)
+            self._doc_index[doc.doc_id]: 1.0 / (i + 1)
+            for i, doc in enumerate(graph_results)
+            if doc.doc_id in self._doc_index
         }
 
         # Combine scores
-        all_doc_ids = set(vector_scores.keys()) | set(graph_scores.keys())
+        all_indices = set(vector_scores.keys()) | set(graph_scores.keys())
         combined_scores = {}
 
-        for doc_id in all_doc_ids:
-            v_score = vector_scores.get(doc_id, 0)
-            g_score = graph_scores.get(doc_id, 0)
-            combined_scores[doc_id] = vector_weight * v_score + graph_weight * g_score
+        for idx in all_indices:
+            v_score = vector_scores.get(idx, 0)
+            g_score = graph_scores.get(idx, 0)
+            combined_scores[idx] = vector_weight * v_score + graph_weight * g_score
 
         # Get top documents
-        top_doc_ids = sorted(
+        top_indices = sorted(
             combined_scores.keys(), key=lambda x: combined_scores[x], reverse=True
         )[:top_k]
 
-        doc_map = {doc.doc_id: doc for doc in self.documents}
-        return [doc_map[doc_id] for doc_id in top_doc_ids if doc_id in doc_map]
-
-    def generate_answer(
-        self, query: str, context_docs: List[Document], max_length: int = 200
-    ) -> str:
-        """
-        Generate answer using retrieved context
+        return [self.documents[idx] for idx in top_indices]
 
-        Args:
-            query: User query
-            context_docs: Retrieved documents for context
-            max_length: Maximum length of generated answer
+    def _clear_result_caches(self):
+        """Drop cached answers and search results after the corpus changes"""
+        self._hybrid_cache.cache_clear()
+        if self.answer_cache is not None:
+            self.answer_cache.clear()
 
-        Returns:
-            Generated answer
-        """
+    def _build_prompt(self, query: str, context_docs: List[Document]) -> str:
+        """Create the generation prompt from retrieved context"""
         # Prepare context
         context = "\n\n".join(
             [
@@ -395,7 +1555,7 @@ class LocalRAGPipeline:
         )
 
         # Create prompt
-        prompt = f"""Based on the following context, answer the question.
+        return f"""Based on the following context, answer the question.
 
 Context:
 {context}
@@ -404,9 +1564,84 @@ Question: {query}
 
 Answer:"""
 
-        # Generate
-        inputs = self.tokenizer(
-            prompt, return_tensors="pt", truncation=True, max_length=1024
+    def generate_answer(
+        self, query: str, context_docs: List[Document], max_length: int = 200
+    ) -> str:
+        """
+        Generate answer using retrieved context
+
+        Args:
+            query: User query
+            context_docs: Retrieved documents for context
+            max_length: Maximum length of generated answer
+
+        Returns:
+            Generated answer
+        """
+        return self.generate_answers([query], [context_docs], max_length)[0]
+
+    def generate_answers(
+        self,
+        queries: List[str],
+        context_docs: List[List[Document]],
+        max_length: int = 200,
+    ) -> List[str]:
+        """
+        Generate answers for several queries with batched LLM calls
+
+        Prompts are sorted by token length and generated in sub-batches of
+        generation_batch_size, so each sub-batch pads to a similar length.
+
+        Args:
+            queries: User queries
+            context_docs: Retrieved documents for each query
+            max_length: Maximum length of each generated answer
+
+        Returns:
+            Generated answers, in the same order as queries
+        """
+        prompts = [
+            self._build_prompt(query, docs)
+            for query, docs in zip(queries, context_docs)
+        ]
+        input_ids = self.tokenizer(prompts, truncation=True, max_length=1024)[
+            "input_ids"
+        ]
+        order = sorted(range(len(prompts)), key=lambda i: len(input_ids[i]))
+
+        answers = [""] * len(prompts)
+        for start in range(0, len(order), self.generation_batch_size):
+            batch = order[start : start + self.generation_batch_size]
+            batch_answers = self._generate_batch(
+                [input_ids[i] for i in batch], max_length
+            )
+            for i, answer in zip(batch, batch_answers):
+                answers[i] = answer
+
+        return answers
+
+    def _generation_kwargs(self, max_length: int, prompt_length: int) -> Dict[str, Any]:
+        """Keyword arguments shared by every llm.generate call"""
+        kwargs = dict(
+            max_new_tokens=max_length,
+            # Stop once the answer is complete instead of always decoding
+            # max_length tokens
+            stopping_criteria=StoppingCriteriaList(
+                [StopOnStrings(self.tokenizer, self.STOP_STRINGS, prompt_length)]
+            ),
+            do_sample=self.do_sample,
+            use_cache=True,
+            pad_token_id=self.tokenizer.pad_token_id,
+        )
+        if self.do_sample:
+            kwargs["temperature"] = 0.7
+        return kwargs
+
+    def _generate_batch(self, input_ids: List[List[int]], max_length: int) -> List[str]:
+        """Generate answers for one sub-batch of tokenized prompts"""
+        # Left-pad to the longest prompt in this sub-batch
+        inputs = self.tokenizer.pad(
+            {"input_ids": input_ids}, padding="longest", return_tensors="pt"
         )
         if torch.cuda.is_available():
             inputs = {k: v.cuda() for k, v in inputs.items()}
@@ -414,94 +1649,431 @@ Answer:"""
         with torch.no_grad():
             outputs = self.llm.generate(
                 **inputs,
-                max_new_tokens=max_length,
-                temperature=0.7,
-                do_sample=True,
-                pad_token_id=self.tokenizer.eos_token_id,
+                **self._generation_kwargs(max_length, inputs["input_ids"].shape[1]),
             )
 
-        answer = self.tokenizer.decode(outputs[0], skip_special_tokens=True)
+        answers = []
+        for output in outputs:
+            answer = self.tokenizer.decode(output, skip_special_tokens=True)
 
-        # Extract just the answer part
-        if "Answer:" in answer:
-            answer = answer.split("Answer:")[-1].strip()
+            # Extract just the answer part
+            if "Answer:" in answer:
+                answer = answer.split("Answer:")[-1].strip()
+            for stop in self.STOP_STRINGS:
+                answer = answer.split(stop)[0]
 
-        return answer
+            answers.append(answer)
 
-    def query(
-        self, question: str, search_type: str = "hybrid", top_k: int = 5
+        return answers
+
+    def generate_answer_stream(
+        self, query: str, context_docs: List[Document], max_length: int = 200
+    ) -> Iterator[str]:
+        """
+        Stream the generated answer as it is produced
+
+        Args:
+            query: User query
+            context_docs: Retrieved documents for context
+            max_length: Maximum length of generated answer
+
+        Yields:
+            Chunks of answer text
+        """
+        prompt = self._build_prompt(query, context_docs)
+        inputs = self.tokenizer(
+            prompt, return_tensors="pt", truncation=True, max_length=1024
+        )
+        if torch.cuda.is_available():
+            inputs = {k: v.cuda() for k, v in inputs.items()}
+
+        # Generate in a background thread; the streamer hands over text
+        streamer = TextIteratorStreamer(
+            self.tokenizer, skip_prompt=True, skip_special_tokens=True
+        )
+        thread = Thread(
+            target=self.llm.generate,
+            kwargs=dict(
+                **inputs,
+                **self._generation_kwargs(max_length, inputs["input_ids"].shape[1]),
+                streamer=streamer,
+            ),
+            daemon=True,
+        )
+        thread.start()
+
+        # Generation stops shortly after a stop string; drop it from the stream
+        yield from _cut_at_stop_strings(streamer, self.STOP_STRINGS)
+        thread.join()
+
+    def _format_result(
+        self,
+        question: str,
+        answer: str,
+        retrieved_docs: List[Document],
+        search_type: str,
     ) -> Dict[str, Any]:
+        """Build the result dictionary returned by the query methods"""
+        return {
+            "question": question,
+            "answer": answer,
+            "retrieved_documents": [
+                {"content": doc.content, "metadata": doc.metadata, "doc_id": doc.doc_id}
+                for doc in retrieved_docs
+            ],
+            "search_type": search_type,
+        }
+
+    def query(
+        self,
+        question: Union[str, List[str]],
+        search_type: str = "hybrid",
+        top_k: int = 5,
+    ) -> Union[Dict[str, Any], List[Dict[str, Any]]]:
         """
         Main query interface
 
         Args:
-            question: User question
+            question: User question, or a list of questions to answer as a
+                batch (see query_batch)
             search_type: Type of search ('vector', 'graph', or 'hybrid')
             top_k: Number of documents to retrieve
 
         Returns:
-            Dictionary with answer and retrieved documents
+            Dictionary with answer and retrieved documents (a list of them
+            when question is a list)
         """
+        if isinstance(question, list):
+            return self.query_batch(question, search_type, top_k)
+
+        # Serve near-duplicate questions from the answer cache
+        query_embedding = self._encode_query(question)
+        cache_key = (search_type, top_k)
+        cached = self._cached_answer(question, query_embedding, cache_key)
+        if cached is not None:
+            return cached
+
         # Retrieve documents
+        retrieved_docs = self.retrieve(question, search_type, top_k)
+
+        # Generate answer
+        answer = self.generate_answer(question, retrieved_docs)
+
+        result = self._format_result(question, answer, retrieved_docs, search_type)
+        self._cache_answer(query_embedding, cache_key, result)
+        return result
+
+    def query_stream(
+        self, question: str, search_type: str = "hybrid", top_k: int = 5
+    ) -> Iterator[str]:
+        """
+        Streaming variant of query
+
+        Args:
+            question: User question
+            search_type: Type of search ('vector', 'graph', or 'hybrid')
+            top_k: Number of documents to retrieve
+
+        Yields:
+            Chunks of answer text
+        """
+        retrieved_docs = self.retrieve(question, search_type, top_k)
+        yield from self.generate_answer_stream(question, retrieved_docs)
+
+    def retrieve(
+        self, question: str, search_type: str = "hybrid", top_k: int = 5
+    ) -> List[Document]:
+        """
+        Retrieve documents for a question without generating an answer
+
+        Args:
+            question: User question
+            search_type: Type of search ('vector', 'graph', or 'hybrid')
+            top_k: Number of documents to retrieve
+
+        Returns:
+            List of retrieved documents
+        """
         if search_type == "vector":
             results = self.vector_search(question, top_k)
-            retrieved_docs = [doc for doc, _ in results]
+            return [doc for doc, _ in results]
         elif search_type == "graph":
-            retrieved_docs = self.graph_search(question, top_k)
+            return self.graph_search(question, top_k)
         else:  # hybrid
-            retrieved_docs = self.hybrid_search(question, top_k)
+            return self.hybrid_search(question, top_k)
 
-        # Generate answer
-        answer = self.generate_answer(question, retrieved_docs)
+    async def aquery(
+        self, question: str, search_type: str = "hybrid", top_k: int = 5
+    ) -> Dict[str, Any]:
+        """
+        Async variant of query
 
-        return {
-            "question": question,
-            "answer": answer,
-            "retrieved_documents": [
-                {"content": doc.content, "metadata": doc.metadata, "doc_id": doc.doc_id}
-                for doc in retrieved_docs
-            ],
-            "search_type": search_type,
-        }
+        Retrieval and generation run in the default executor so concurrent
+        callers overlap instead of blocking the event loop.
+
+        Args:
+            question: User question
+            search_type: Type of search ('vector', 'graph', or 'hybrid')
+            top_k: Number of documents to retrieve
+
+        Returns:
+            Dictionary with answer and retrieved documents
+        """
+        loop = asyncio.get_running_loop()
+
+        # Serve near-duplicate questions from the answer cache
+        query_embedding = await loop.run_in_executor(None, self._encode_query, question)
+        cache_key = (search_type, top_k)
+        cached = self._cached_answer(question, query_embedding, cache_key)
+        if cached is not None:
+            return cached
+
+        retrieved_docs = await loop.run_in_executor(
+            None, functools.partial(self.retrieve, question, search_type, top_k)
+        )
+        answer = await loop.run_in_executor(
+            None, functools.partial(self.generate_answer, question, retrieved_docs)
+        )
+
+        result = self._format_result(question, answer, retrieved_docs, search_type)
+        self._cache_answer(query_embedding, cache_key, result)
+        return result
+
+    def query_batch(
+        self, questions: List[str], search_type: str = "hybrid", top_k: int = 5
+    ) -> List[Dict[str, Any]]:
+        """
+        Answer several questions with one embedding pass and one index search
+
+        Args:
+            questions: User questions
+            search_type: Type of search ('vector', 'graph', or 'hybrid')
+            top_k: Number of documents to retrieve per question
+
+        Returns:
+            List of result dictionaries, in the same order as questions
+        """
+        if not questions:
+            return []
+
+        query_embeddings = self._encode(questions)
+        cache_key = (search_type, top_k)
+
+        # Serve near-duplicate questions from the answer cache
+        results: List[Optional[Dict[str, Any]]] = [
+            self._cached_answer(question, query_embeddings[i : i + 1], cache_key)
+            for i, question in enumerate(questions)
+        ]
+        misses = [i for i, result in enumerate(results) if result is None]
+        if not misses:
+            return results
+
+        miss_questions = [questions[i] for i in misses]
+        retrieved = self._retrieve_batch(
+            miss_questions, query_embeddings[misses], search_type, top_k
+        )
+
+        # Generate all answers in one batched LLM call
+        answers = self.generate_answers(miss_questions, retrieved)
+
+        for i, question, answer, docs in zip(
+            misses, miss_questions, answers, retrieved
+        ):
+            results[i] = self._format_result(question, answer, docs, search_type)
+            self._cache_answer(query_embeddings[i : i + 1], cache_key, results[i])
+
+        return results
+
+    def _retrieve_batch(
+        self,
+        questions: List[str],
+        query_embeddings: np.ndarray,
+        search_type: str,
+        top_k: int,
+    ) -> List[List[Document]]:
+        """Retrieve documents for several pre-encoded questions"""
+        if search_type == "graph":
+            return [self.graph_search(question, top_k) for question in questions]
+
+        if self.vector_index is None:
+            raise ValueError("Vector index not built. Call build_vector_index first.")
+
+        if search_type == "vector":
+            _, indices = self._search_index(query_embeddings, top_k)
+            return [[self.documents[idx] for idx in row if idx >= 0] for row in indices]
+
+        # hybrid (graph search overlaps the FAISS search)
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            graph_future = executor.submit(
+                lambda: [self.graph_search(q, top_k * 2) for q in questions]
+            )
+            return self._hybrid_batch(query_embeddings, graph_future, top_k, 0.7, 0.3)
+
+    def _cached_answer(
+        self, question: str, query_embedding: np.ndarray, cache_key: Tuple[str, int]
+    ) -> Optional[Dict[str, Any]]:
+        """Return a copy of a cached result for a near-duplicate question"""
+        if self.answer_cache is None:
+            return None
+
+        cached = self.answer_cache.lookup(query_embedding, cache_key)
+        if cached is None:
+            return None
+
+        result = copy.deepcopy(cached)
+        result["question"] = question
+        return result
+
+    def _cache_answer(
+        self,
+        query_embedding: np.ndarray,
+        cache_key: Tuple[str, int],
+        result: Dict[str, Any],
+    ):
+        """Store a copy of a result, so callers may modify the one they get"""
+        if self.answer_cache is not None:
+            self.answer_cache.insert(query_embedding, cache_key, copy.deepcopy(result))
 
     def save(self):
         """Save the RAG pipeline to disk"""
         print("Saving RAG pipeline...")
 
-        # Save documents
-        with open(self.storage_path / "documents.pkl", "wb") as f:
-            pickle.dump(self.documents, f)
+        # Save documents. Data still mapped from this storage path is
+        # unchanged since load() and is not rewritten: replacing a mapped
+        # file fails on Windows
+        if not _is_mapped_from(
+            self.documents, self.storage_path / DocumentStore.BLOB_FILE
+        ):
+            DocumentStore.write(self.storage_path, self.documents)
+
+        # Save embedding matrix
+        embeddings_path = self.storage_path / "embeddings.npy"
+        if self.embeddings is not None and not _is_mapped_from(
+            self.embeddings, embeddings_path
+        ):
+            with _atomic_path(embeddings_path) as tmp_path, open(tmp_path, "wb") as f:
+                np.save(f, self.embeddings)
+            scales_path = self.storage_path / "embedding_scales.npy"
+            if self.embedding_scales is not None:
+                np.save(scales_path, self.embedding_scales)
+            elif scales_path.exists():
+                # Stale scales from an earlier int8 save
+                scales_path.unlink()
 
         # Save vector index
         if self.vector_index is not None:
-            faiss.write_index(
-                self.vector_index, str(self.storage_path / "vector_index.faiss")
+            cpu_index = (
+                self._cpu_index if self._cpu_index is not None else self.vector_index
             )
-
-        # Save knowledge graph
+            index_path = self.storage_path / "vector_index.faiss"
+            if self._index_file is not None:
+                # A memory-mapped index is an unchanged copy of its file.
+                # Re-serializing it would write mapped IVF lists as a bare
+                # on-disk reference instead of their data, so copy the file
+                if self._index_file.resolve() != index_path.resolve():
+                    with _atomic_path(index_path) as tmp_path:
+                        shutil.copyfile(self._index_file, tmp_path)
+            else:
+                # Write then rename: the file may still be memory-mapped
+                with _atomic_path(index_path) as tmp_path:
+                    faiss.write_index(cpu_index, str(tmp_path))
+
+        # Save knowledge graph, plus its CSR export so load can skip rebuilding it
         with open(self.storage_path / "knowledge_graph.gpickle", "wb") as f:
-            pickle.dump(self.knowledge_graph, f)
+            pickle.dump(self.knowledge_graph, f, protocol=pickle.HIGHEST_PROTOCOL)
+        if self._graph_indptr is not None:
+            np.savez(
+                self.storage_path / "knowledge_graph_csr.npz",
+                indptr=self._graph_indptr,
+                indices=self._graph_indices,
+                weights=self._graph_weights,
+                degree=self._node_degree,
+            )
+
+        # Save answer cache
+        if self.answer_cache is not None:
+            with open(self.storage_path / "answer_cache.pkl", "wb") as f:
+                pickle.dump(self.answer_cache, f)
 
         print(f"Pipeline saved to {self.storage_path}")
 
+    @staticmethod
+    def storage_exists(storage_path: str) -> bool:
+        """Check whether a saved pipeline exists at storage_path"""
+        path = Path(storage_path)
+        return DocumentStore.exists(path) or (path / "documents.pkl").exists()
+
+    def _document_ids(self) -> List[str]:
+        """Document ids in index order, without decoding document text"""
+        if isinstance(self.documents, DocumentStore):
+            return list(self.documents.doc_ids)
+        return [doc.doc_id for doc in self.documents]
+
     def load(self):
         """Load the RAG pipeline from disk"""
         print("Loading RAG pipeline...")
+        self._clear_result_caches()
+
+        # Load documents (text stays in the memory-mapped blob)
+        if DocumentStore.exists(self.storage_path):
+            self.documents = DocumentStore.open(self.storage_path)
+        else:
+            # Legacy pickle format (one read, then unpickle from memory)
+            self.documents = pickle.loads(
+                (self.storage_path / "documents.pkl").read_bytes()
+            )
+        self._doc_index = {doc_id: i for i, doc_id in enumerate(self._document_ids())}
 
-        # Load documents
-        with open(self.storage_path / "documents.pkl", "rb") as f:
-            self.documents = pickle.load(f)
+        # Load embedding matrix (memory-mapped, paged in on demand)
+        if (self.storage_path / "embeddings.npy").exists():
+            self.embeddings = np.load(
+                self.storage_path / "embeddings.npy", mmap_mode="r"
+            )
+            scales_path = self.storage_path / "embedding_scales.npy"
+            self.embedding_scales = (
+                np.load(scales_path)
+                if self.embeddings.dtype == np.int8 and scales_path.exists()
+                else None
+            )
+        elif (
+            self.documents and getattr(self.documents[0], "embedding", None) is not None
+        ):
+            # Legacy stores kept one embedding per pickled Document
+            self._set_embeddings(
+                np.ascontiguousarray(
+                    np.stack([doc.embedding for doc in self.documents]),
+                    dtype=np.float32,
+                )
+            )
 
         # Load vector index
         if (self.storage_path / "vector_index.faiss").exists():
+            self._index_file = self.storage_path / "vector_index.faiss"
             self.vector_index = faiss.read_index(
-                str(self.storage_path / "vector_index.faiss")
+                str(self._index_file), faiss.IO_FLAG_MMAP
             )
+            self.vector_index = self._to_gpu(self.vector_index)
 
         # Load knowledge graph
         if (self.storage_path / "knowledge_graph.gpickle").exists():
-            with open(self.storage_path / "knowledge_graph.gpickle", "rb") as f:
-                self.knowledge_graph = pickle.load(f)
+            self.knowledge_graph = pickle.loads(
+                (self.storage_path / "knowledge_graph.gpickle").read_bytes()
+            )
+            csr_path = self.storage_path / "knowledge_graph_csr.npz"
+            if csr_path.exists():
+                with np.load(csr_path) as saved:
+                    self._build_graph_arrays(dict(saved))
+            else:
+                self._build_graph_arrays()
+
+        # Load answer cache
+        cache_path = self.storage_path / "answer_cache.pkl"
+        if self.answer_cache is not None and cache_path.exists():
+            cache = pickle.loads(cache_path.read_bytes())
+            if cache.dim == self.embedding_dim:
+                cache.threshold = self.answer_cache.threshold
+                cache.max_entries = self.answer_cache.max_entries
+                self.answer_cache = cache
 
         print(f"Pipeline loaded from {self.storage_path}")
 
@@ -3,13 +3,30 @@ Basic tests for Local RAG Pipeline
 """
 
 import pytest
+import pickle
 import sys
 from pathlib import Path
 
 # Add src to path
 sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
 
-from rag_pipeline import LocalRAGPipeline, Document
+import numpy as np
+
+import rag_pipeline
+from rag_pipeline import (
+    LocalRAGPipeline,
+    Document,
+    DocumentStore,
+    EmbeddingCache,
+    SemanticCache,
+    StopOnStrings,
+    MIN_PROCESS_FILES,
+    _cosine_similarity,
+    _cut_at_stop_strings,
+    _quantize_int8,
+)
+from graph_kernels import score_nodes
+from rag_interface import QueryBatcher
 
 
 def test_document_creation():
@@ -69,6 +86,36 @@ def test_document_loading():
     test_dir.rmdir()
 
 
+def test_parallel_loading_with_custom_splitter(tmp_path, monkeypatch):
+    """Test that process-pooled files are chunked with non-default splitters"""
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+    # Route plain text through the worker processes like PDF/DOCX files
+    monkeypatch.setattr(rag_pipeline, "PROCESS_EXTENSIONS", {".txt"})
+    n_files = MIN_PROCESS_FILES + 1
+    for i in range(n_files):
+        (tmp_path / f"doc{i}.txt").write_text("Some words here. " * 20)
+
+    rag = object.__new__(LocalRAGPipeline)
+    rag.n_workers = 2
+
+    # Built-in splitter with non-default sizes, rebuilt inside the workers
+    rag._splitter_args = ("recursive", 40, 0)
+    rag.text_splitter = rag_pipeline._make_text_splitter(*rag._splitter_args)
+    chunks = rag._load_files(sorted(tmp_path.glob("*.txt")))
+    assert all(len(docs) > 1 for docs in chunks)
+
+    # Custom splitter holding a closure that cannot be pickled
+    scale = 1
+    rag._splitter_args = None
+    rag.text_splitter = RecursiveCharacterTextSplitter(
+        chunk_size=40, chunk_overlap=0, length_function=lambda text: len(text) * scale
+    )
+    chunks = rag._load_files(sorted(tmp_path.glob("*.txt")))
+    assert [len(docs) for docs in chunks] == [len(chunks[0])] * n_files
+    assert len(chunks[0]) > 1
+
+
 def test_vector_index_build():
     """Test vector index building"""
     pytest.skip("Requires pipeline initialization")
@@ -85,6 +132,161 @@ def test_vector_index_build():
     assert rag.vector_index is not None
 
 
+def test_vector_search_skips_missing_results():
+    """Test that FAISS -1 padding does not map to the last document"""
+    import faiss
+
+    rag = object.__new__(LocalRAGPipeline)
+    rag.documents = [
+        Document(content="First", metadata={}, doc_id="1"),
+        Document(content="Second", metadata={}, doc_id="2"),
+    ]
+    rag.vector_index = faiss.IndexFlatIP(2)
+    rag.vector_index.add(np.eye(2, dtype=np.float32))
+    rag._nprobe = 1
+
+    # Asking for more results than indexed vectors pads with -1
+    results = rag.vector_search(np.array([[1.0, 0.0]], dtype=np.float32), top_k=4)
+
+    assert [[doc.doc_id for doc, _ in row] for row in results] == [["1", "2"]]
+    assert results[0][0][1] == pytest.approx(1.0)
+
+
+def _bare_pipeline(storage_path, **attrs):
+    """Pipeline with storage and index state but no models loaded"""
+    import functools
+    import networkx as nx
+
+    rag = object.__new__(LocalRAGPipeline)
+    rag.storage_path = Path(storage_path)
+    rag.storage_path.mkdir(exist_ok=True)
+    rag.embedding_dim = 16
+    rag.index_type = "auto"
+    rag.hnsw_threshold = 10_000
+    rag.ivf_threshold = 50_000
+    rag.ivf_nlist = None
+    rag._nprobe = 4
+    rag.use_gpu_index = False
+    rag._gpu_resources = None
+    rag._cpu_index = None
+    rag._index_file = None
+    rag.vector_index = None
+    rag.documents = []
+    rag.embeddings = None
+    rag.embedding_scales = None
+    rag.knowledge_graph = nx.DiGraph()
+    rag._graph_indptr = None
+    rag.answer_cache = None
+    rag._hybrid_cache = functools.lru_cache()(len)
+    for name, value in attrs.items():
+        setattr(rag, name, value)
+    return rag
+
+
+@pytest.mark.parametrize("index_type", ["flat", "hnsw", "ivfpq"])
+def test_index_save_load_round_trip(tmp_path, index_type):
+    """Test that a loaded index survives being saved and loaded again"""
+    rng = np.random.default_rng(0)
+    embeddings = rng.standard_normal((1000, 16)).astype(np.float32)
+    embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+    docs = [
+        Document(content=f"Chunk {i}", metadata={}, doc_id=str(i))
+        for i in range(len(embeddings))
+    ]
+    queries = embeddings[:5]
+
+    rag = _bare_pipeline(tmp_path, index_type=index_type, documents=docs)
+    rag.vector_index = rag._create_index(embeddings)
+    rag.embeddings = embeddings
+    expected = [[doc.doc_id for doc, _ in row] for row in rag.vector_search(queries)]
+    rag.save()
+    index_size = (tmp_path / "vector_index.faiss").stat().st_size
+
+    # load -> save -> load must not lose the memory-mapped index data
+    for _ in range(2):
+        rag = _bare_pipeline(tmp_path)
+        rag.load()
+        rag.save()
+
+    assert (tmp_path / "vector_index.faiss").stat().st_size == index_size
+    rag = _bare_pipeline(tmp_path)
+    rag.load()
+    found = [[doc.doc_id for doc, _ in row] for row in rag.vector_search(queries)]
+    assert found == expected
+
+
+def test_save_keeps_mapped_files(tmp_path):
+    """Test that saving a loaded store does not replace its mapped files"""
+    docs = [Document(content=f"Chunk {i}", metadata={}, doc_id=str(i)) for i in range(3)]
+    embeddings = np.eye(3, 16, dtype=np.float32)
+    _bare_pipeline(tmp_path, documents=docs, embeddings=embeddings).save()
+
+    rag = _bare_pipeline(tmp_path)
+    rag.load()
+    mapped = ["documents.bin", "embeddings.npy"]
+    inodes = [(tmp_path / name).stat().st_ino for name in mapped]
+    rag.save()
+    assert [(tmp_path / name).stat().st_ino for name in mapped] == inodes
+
+    # Saving elsewhere still writes everything
+    rag.storage_path = tmp_path / "copy"
+    rag.storage_path.mkdir()
+    rag.save()
+    copy = _bare_pipeline(tmp_path / "copy")
+    copy.load()
+    assert [doc.content for doc in copy.documents] == [doc.content for doc in docs]
+    np.testing.assert_array_equal(copy.embeddings, embeddings)
+
+
+def test_vector_search_legacy_l2_index(tmp_path):
+    """Test that legacy L2 indexes still report cosine similarities"""
+    import faiss
+
+    vectors = np.array([[1.0, 0.0], [0.6, 0.8], [-1.0, 0.0]], dtype=np.float32)
+    docs = [Document(content=str(i), metadata={}, doc_id=str(i)) for i in range(3)]
+    rag = _bare_pipeline(tmp_path, documents=docs, vector_index=faiss.IndexFlatL2(2))
+    rag.vector_index.add(vectors)
+
+    results = rag.vector_search(vectors[:1], top_k=3)[0]
+
+    assert [doc.doc_id for doc, _ in results] == ["0", "1", "2"]
+    np.testing.assert_allclose([score for _, score in results], [1.0, 0.6, -1.0])
+
+
+def test_nprobe_change_clears_cached_results(tmp_path):
+    """Test that retuning IVF search drops results cached with the old setting"""
+    rag = _bare_pipeline(tmp_path, answer_cache=SemanticCache(dim=2))
+    rag._hybrid_cache("query")
+    rag.answer_cache.insert(np.array([[1.0, 0.0]], dtype=np.float32), "key", "a")
+
+    rag.nprobe = 8
+
+    assert rag.nprobe == 8
+    assert rag._hybrid_cache.cache_info().currsize == 0
+    assert len(rag.answer_cache) == 0
+
+
+def test_answer_cache_isolated_from_callers(tmp_path):
+    """Test that cached answers survive callers mutating their results"""
+    import asyncio
+
+    rag = _bare_pipeline(tmp_path, answer_cache=SemanticCache(dim=2))
+    rag._encode_query = lambda question: np.array([[1.0, 0.0]], dtype=np.float32)
+    rag.retrieve = lambda question, search_type, top_k: []
+    calls = []
+    rag.generate_answer = lambda question, docs: calls.append(question) or "answer"
+
+    result = rag.query("first")
+    result["answer"] = "MUTATED"
+    assert rag.query("second")["answer"] == "answer"
+
+    # The async API shares the same cache
+    result = asyncio.run(rag.aquery("third"))
+    assert result["answer"] == "answer"
+    assert result["question"] == "third"
+    assert calls == ["first"]
+
+
 def test_knowledge_graph_build():
     """Test knowledge graph building"""
     pytest.skip("Requires pipeline initialization")
@@ -101,5 +303,185 @@ def test_knowledge_graph_build():
     assert rag.knowledge_graph.number_of_nodes() > 0
 
 
+def test_knowledge_graph_source_hubs():
+    """Test that chunks of one file are linked through a single source node"""
+    import functools
+    import networkx as nx
+
+    rag = object.__new__(LocalRAGPipeline)
+    rag._hybrid_cache = functools.lru_cache()(len)
+    rag.answer_cache = None
+    rag.knowledge_graph = nx.DiGraph()
+    docs = [
+        Document(content="Python basics", metadata={"source": "a.txt"}, doc_id="a_0"),
+        Document(content="Python advanced", metadata={"source": "a.txt"}, doc_id="a_1"),
+        Document(content="Statistics", metadata={"source": "b.txt"}, doc_id="b_0"),
+    ]
+
+    rag.build_knowledge_graph(docs)
+    graph = rag.knowledge_graph
+
+    assert graph.nodes["source:a.txt"]["type"] == "source"
+    assert set(graph.predecessors("source:a.txt")) == {"a_0", "a_1"}
+    assert set(graph.predecessors("source:b.txt")) == {"b_0"}
+    assert not graph.has_edge("a_0", "a_1") and not graph.has_edge("a_1", "a_0")
+    assert graph.edges["a_0", "source:a.txt"]["relation"] == "same_source"
+
+    # Documents mentioning the query entity rank first
+    rag.documents = docs
+    rag._doc_index = {doc.doc_id: i for i, doc in enumerate(docs)}
+    assert [doc.doc_id for doc in rag.graph_search("Python")][:2] == ["a_0", "a_1"]
+
+
+def test_cosine_similarity():
+    """Test batched cosine similarity kernel"""
+    queries = np.array([[1.0, 0.0, 0.0]], dtype=np.float32)
+    matrix = np.array(
+        [[2.0, 0.0, 0.0], [0.0, 1.0, 0.0], [-1.0, 0.0, 0.0]], dtype=np.float32
+    )
+
+    similarities = _cosine_similarity(queries, matrix)
+
+    assert similarities.shape == (1, 3)
+    np.testing.assert_allclose(similarities[0], [1.0, 0.0, -1.0], atol=1e-5)
+
+
+def test_quantize_int8():
+    """Test int8 quantization preserves cosine ranking"""
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((20, 16)).astype(np.float32)
+
+    quantized, scales = _quantize_int8(vectors)
+
+    assert quantized.dtype == np.int8
+    assert scales.shape == (20,)
+    np.testing.assert_allclose(quantized * scales[:, None], vectors, atol=0.05)
+
+    exact = _cosine_similarity(vectors[:1], vectors)[0]
+    approx = _cosine_similarity(quantized[:1], quantized)[0]
+    assert np.argmax(approx) == np.argmax(exact)
+
+
+def test_score_nodes():
+    """Test personalized PageRank kernel on a small path graph"""
+    # Path graph 0 - 1 - 2 - 3 with transition weights 1 / degree(u)
+    indptr = np.array([0, 1, 3, 5, 6], dtype=np.int32)
+    indices = np.array([1, 0, 2, 1, 3, 2], dtype=np.int32)
+    weights = np.array([0.5, 1.0, 0.5, 0.5, 1.0, 0.5], dtype=np.float32)
+    scores = np.zeros(4, dtype=np.float32)
+
+    score_nodes(np.array([0], dtype=np.int32), indptr, indices, weights, scores)
+
+    assert scores[0] > scores[2] > scores[3]
+    assert scores[1] > scores[3]
+
+
+def test_embedding_cache(tmp_path):
+    """Test embedding cache round trip"""
+    cache = EmbeddingCache(tmp_path / "emb_cache.db", "test-model")
+    key = EmbeddingCache.content_key("Test content")
+    vector = np.arange(4, dtype=np.float32)
+
+    cache.put_many({key: vector})
+
+    reopened = EmbeddingCache(tmp_path / "emb_cache.db", "test-model")
+    found = reopened.get_many([key, EmbeddingCache.content_key("Other content")])
+    assert list(found) == [key]
+    np.testing.assert_array_equal(found[key], vector)
+
+    other_model = EmbeddingCache(tmp_path / "emb_cache.db", "other-model")
+    assert other_model.get_many([key]) == {}
+
+
+def test_document_store(tmp_path):
+    """Test document store round trip"""
+    docs = [
+        Document(content="First chunk", metadata={"source": "a.txt"}, doc_id="a_0"),
+        Document(content="Zweiter Abschnitt ü", metadata={}, doc_id="b_0"),
+    ]
+
+    DocumentStore.write(tmp_path, docs)
+    assert DocumentStore.exists(tmp_path)
+
+    store = DocumentStore.open(tmp_path)
+    assert len(store) == 2
+    assert store[1].content == docs[1].content
+    assert store[-2].metadata == {"source": "a.txt"}
+    assert [doc.doc_id for doc in store[0:2]] == ["a_0", "b_0"]
+
+
+def test_stop_on_strings():
+    """Test that generation stops per sequence on a stop string"""
+    import torch
+
+    class StubTokenizer:
+        vocab = ["<p>", "word", "\n\n"]
+
+        def batch_decode(self, ids, skip_special_tokens=True):
+            return ["".join(self.vocab[i] for i in row) for row in ids.tolist()]
+
+    stop = StopOnStrings(StubTokenizer(), ["\n\n"], prompt_length=2)
+    input_ids = torch.tensor([[0, 0, 1, 2], [0, 0, 1, 1], [0, 0, 2, 1]])
+
+    # Leading whitespace before the answer does not count as a stop
+    assert stop(input_ids, None).tolist() == [True, False, False]
+
+
+def test_cut_at_stop_strings():
+    """Test that streamed answers end before a stop string split across chunks"""
+    stops = ["\n\n", "\nQuestion:"]
+    chunks = ["\n", " Py", "thon is", "\n", "Qu", "estion: next"]
+
+    assert "".join(_cut_at_stop_strings(chunks, stops)) == "Python is"
+    assert "".join(_cut_at_stop_strings(["a", "\n", "b"], stops)) == "a\nb"
+
+
+def test_query_batcher():
+    """Test that concurrent queries are coalesced into one batch"""
+    import asyncio
+
+    class StubPipeline:
+        def __init__(self):
+            self.batches = []
+
+        def query_batch(self, questions, search_type, top_k):
+            self.batches.append(list(questions))
+            return [{"question": q, "answer": q.upper()} for q in questions]
+
+    rag = StubPipeline()
+    batcher = QueryBatcher(rag)
+
+    async def run():
+        return await asyncio.gather(*[batcher.submit(f"q{i}") for i in range(3)])
+
+    results = asyncio.run(run())
+    assert [r["answer"] for r in results] == ["Q0", "Q1", "Q2"]
+    assert rag.batches == [["q0", "q1", "q2"]]
+
+
+def test_semantic_cache():
+    """Test semantic answer cache hits, eviction and pickling"""
+    cache = SemanticCache(dim=2, threshold=0.97, max_entries=2)
+    a = np.array([[1.0, 0.0]], dtype=np.float32)
+    b = np.array([[0.0, 1.0]], dtype=np.float32)
+    near_a = np.array([[0.999, 0.045]], dtype=np.float32)
+    near_a /= np.linalg.norm(near_a)
+
+    cache.insert(a, "hybrid", "answer a")
+    cache.insert(b, "hybrid", "answer b")
+
+    assert cache.lookup(near_a, "hybrid") == "answer a"
+    assert cache.lookup(near_a, "vector") is None
+
+    # "a" was used most recently, so "b" is evicted
+    cache.insert(-a, "hybrid", "answer -a")
+    assert len(cache) == 2
+    assert cache.lookup(b, "hybrid") is None
+
+    restored = pickle.loads(pickle.dumps(cache))
+    assert restored.lookup(a, "hybrid") == "answer a"
+    assert restored.lookup(-a, "hybrid") == "answer -a"
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])